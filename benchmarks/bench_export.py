@@ -0,0 +1,102 @@
+"""Benchmark de l'export du tarif catalogue (100k lignes, XLSX et CSV).
+
+Un catalogue synthétique (10 catégories) est tarifé puis exporté, comme le fait le
+bouton "Exporter le tarif catalogue" de la barre latérale. Le coût d'envoi du
+catalogue à un processus de travail (SIMULATEUR_WORKERS > 0) est mesuré à part.
+
+Usage (depuis la racine du dépôt) :
+    python benchmarks/bench_export.py
+"""
+import multiprocessing
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+from export import export_csv, render_price_list_xlsx  # noqa: E402
+
+# Objectifs (secondes, médiane des exécutions, tarification comprise)
+CATALOGUE_ROWS = 100_000
+XLSX_TARGET = 8.0
+CSV_TARGET = 8.0
+TRANSFER_TARGET = 0.5
+RUNS = 3
+
+
+def make_catalogue(rows=CATALOGUE_ROWS, categories=10, seed=0):
+    """Catalogue synthétique au format de initialize_dataframe_columns"""
+    rng = np.random.default_rng(seed)
+    prix_brut = rng.uniform(20, 400, rows).round(2)
+    return pd.DataFrame({
+        'Catégorie produit': [f"Catégorie {i % categories}" for i in range(rows)],
+        'Libellé article': [f"Monture modèle {i}" for i in range(rows)],
+        'Version': rng.choice(['Solaire', 'Optique', 'Junior'], rows),
+        'Code EDI': [f"EDI{i:08d}" for i in range(rows)],
+        'Prix Brut HT': prix_brut,
+        'Prix Net HT': (prix_brut * 0.8).round(2),
+        'Remise (€)': 0.0,
+        'Remise (%)': rng.choice([0.0, 5.0, 10.0, 12.5], rows),
+        'Remise autre (€)': 0.0,
+        'Prix net après remise': 0.0,
+        'Coeff': rng.choice([2.0, 2.5, 3.0], rows),
+        'PPGC HT': 0.0,
+        'PPGC TTC': 0.0,
+        'Marge brute (€)': 0.0,
+        'Marge nette (€)': 0.0,
+        'Taux de marque': 0.0,
+        'RFA': rng.choice([0.0, 2.0, 5.0], rows),
+        'Prix Net Net': 0.0
+    })
+
+
+def timed(func, *args):
+    """Renvoie la médiane des durées d'exécution de func(*args)"""
+    durations = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        func(*args)
+        durations.append(time.perf_counter() - start)
+    return statistics.median(durations)
+
+
+def main():
+    from proposition import calculate_derived_values
+
+    catalogue = make_catalogue()
+    xlsx = timed(render_price_list_xlsx, catalogue)
+    csv = timed(lambda df: export_csv(calculate_derived_values(df)), catalogue)
+
+    # Envoi du catalogue à un processus de travail (sérialisation + transfert), puis tâche complète
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+        pool.submit(len, []).result()
+        transfer = timed(lambda df: pool.submit(len, df).result(), catalogue)
+        xlsx_pool = timed(lambda df: pool.submit(render_price_list_xlsx, df).result(), catalogue)
+
+    size = len(render_price_list_xlsx(catalogue)) / 1e6
+    print(f"Export XLSX {CATALOGUE_ROWS} lignes : {xlsx:.2f} s (objectif {XLSX_TARGET:.1f} s, {size:.1f} Mo)")
+    print(f"Export CSV  {CATALOGUE_ROWS} lignes : {csv:.2f} s (objectif {CSV_TARGET:.1f} s)")
+    print(f"Envoi du catalogue au processus de travail : {transfer:.3f} s (objectif {TRANSFER_TARGET:.1f} s)")
+    print(f"Export XLSX via le pool : {xlsx_pool:.2f} s")
+
+    failures = []
+    if xlsx > XLSX_TARGET:
+        failures.append("export XLSX au-dessus de l'objectif")
+    if csv > CSV_TARGET:
+        failures.append("export CSV au-dessus de l'objectif")
+    if transfer > TRANSFER_TARGET:
+        failures.append("envoi du catalogue au-dessus de l'objectif")
+
+    for failure in failures:
+        print(f"ÉCHEC : {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,146 @@
+"""Benchmark de démarrage du simulateur (démarrage à froid et premier rendu).
+
+Chaque mesure est faite dans un processus Python neuf (caches vides) :
+  - import à froid : import de streamlit, pandas et des modules de l'application ;
+  - premier rendu : première exécution complète de script.py via AppTest.
+Le premier rendu est mesuré dans deux copies de l'application (répertoires temporaires) :
+  - sans catalogue : écran d'accueil vide ;
+  - avec catalogue : articles.xlsx synthétique (lecture Excel + grille des articles),
+    le cas réel d'un démarrage en production.
+ReportLab ne doit jamais être importé au premier rendu ; openpyxl et st_aggrid
+seulement quand un catalogue par défaut est présent.
+
+Usage (depuis la racine du dépôt) :
+    python benchmarks/bench_startup.py            # mesures + vérification des objectifs
+    python benchmarks/bench_startup.py --profile  # profil des imports (python -X importtime)
+"""
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+# Objectifs (secondes, médiane des exécutions)
+COLD_IMPORT_TARGET = 1.5
+FIRST_RENDER_EMPTY_TARGET = 1.0
+FIRST_RENDER_CATALOGUE_TARGET = 3.0
+CATALOGUE_ROWS = 3000
+RUNS = 5
+
+# Modules lourds qui ne doivent pas être chargés avant leur premier usage
+DEFERRED_MODULES = ['reportlab', 'openpyxl', 'st_aggrid']
+CATALOGUE_MODULES = ['openpyxl', 'st_aggrid']
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_FILES = ['script.py', 'proposition.py', 'export.py', 'mont-royal-logo.jpg']
+
+CHILD_CODE = """
+import json, sys, time
+start = time.perf_counter()
+import streamlit, pandas, proposition, export
+cold_import = time.perf_counter() - start
+
+from streamlit.testing.v1 import AppTest
+start = time.perf_counter()
+app = AppTest.from_file("script.py", default_timeout=60).run()
+first_render = time.perf_counter() - start
+
+print(json.dumps({
+    "cold_import": cold_import,
+    "first_render": first_render,
+    "exceptions": [str(e.value) for e in app.exception],
+    "loaded": sorted(m for m in %r if m in sys.modules),
+}))
+""" % (DEFERRED_MODULES,)
+
+
+def make_app_dir(with_catalogue):
+    """Copie l'application dans un répertoire temporaire, avec ou sans articles.xlsx"""
+    app_dir = tempfile.mkdtemp(prefix="simulateur-bench-")
+    for filename in APP_FILES:
+        if os.path.exists(os.path.join(REPO_DIR, filename)):
+            shutil.copy(os.path.join(REPO_DIR, filename), app_dir)
+    if with_catalogue:
+        sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+        from bench_export import make_catalogue
+        make_catalogue(rows=CATALOGUE_ROWS).to_excel(os.path.join(app_dir, "articles.xlsx"), index=False)
+    return app_dir
+
+
+def run_child(app_dir):
+    """Lance une mesure dans un processus neuf et renvoie le résultat JSON"""
+    output = subprocess.run(
+        [sys.executable, "-c", CHILD_CODE],
+        cwd=app_dir, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def measure(with_catalogue):
+    """Médianes (import à froid, premier rendu), exceptions et modules chargés d'un scénario"""
+    app_dir = make_app_dir(with_catalogue)
+    try:
+        results = [run_child(app_dir) for _ in range(RUNS)]
+    finally:
+        shutil.rmtree(app_dir, ignore_errors=True)
+    return (
+        statistics.median(r["cold_import"] for r in results),
+        statistics.median(r["first_render"] for r in results),
+        results[0]["exceptions"],
+        results[0]["loaded"],
+    )
+
+
+def profile_imports(top=15):
+    """Affiche les modules les plus coûteux à l'import de script.py"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import streamlit, pandas, proposition, export"],
+        cwd=REPO_DIR, capture_output=True, text=True, check=True
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = [part.strip() for part in line[len("import time:"):].split("|")]
+        rows.append((int(cumulative), name))
+    for cumulative, name in sorted(rows, reverse=True)[:top]:
+        print(f"{cumulative / 1e6:8.3f} s  {name}")
+
+
+def main():
+    if "--profile" in sys.argv:
+        profile_imports()
+        return 0
+
+    failures = []
+    scenarios = [
+        ("sans catalogue", False, FIRST_RENDER_EMPTY_TARGET, []),
+        (f"catalogue {CATALOGUE_ROWS} lignes", True, FIRST_RENDER_CATALOGUE_TARGET, CATALOGUE_MODULES),
+    ]
+    for label, with_catalogue, render_target, allowed in scenarios:
+        cold_import, first_render, exceptions, loaded = measure(with_catalogue)
+
+        print(f"[{label}]")
+        print(f"  Import à froid : {cold_import:.3f} s (objectif {COLD_IMPORT_TARGET:.1f} s)")
+        print(f"  Premier rendu  : {first_render:.3f} s (objectif {render_target:.1f} s)")
+        print(f"  Modules différés chargés au premier rendu : {', '.join(loaded) or 'aucun'}")
+
+        if cold_import > COLD_IMPORT_TARGET:
+            failures.append(f"{label} : import à froid au-dessus de l'objectif")
+        if first_render > render_target:
+            failures.append(f"{label} : premier rendu au-dessus de l'objectif")
+        if exceptions:
+            failures.append(f"{label} : exceptions au premier rendu : {exceptions}")
+        unexpected = [m for m in loaded if m not in allowed]
+        if unexpected:
+            failures.append(f"{label} : modules chargés trop tôt : {', '.join(unexpected)}")
+
+    for failure in failures:
+        print(f"ÉCHEC : {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
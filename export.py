@@ -0,0 +1,276 @@
+import pandas as pd
+import numpy as np
+import zipfile
+from io import BytesIO
+from xml.sax.saxutils import escape, quoteattr
+from proposition import calculate_derived_values, DEFAULT_ROUNDING, UNCATEGORIZED_LABEL
+
+# Export tableur (XLSX / CSV) des propositions tarifées et des tarifs catalogue.
+# - Panier (export_xlsx) : classeur openpyxl en mode "write-only".
+# - Tarif catalogue (export_xlsx_streaming) : le XML des feuilles est généré colonne
+#   par colonne, par blocs de lignes, et écrit en flux dans l'archive XLSX ; la mémoire
+#   reste bornée par la taille d'un bloc (100k lignes en quelques secondes).
+
+# Colonnes exportées : récapitulatif du panier + marges et taux de marque
+EXPORT_COLUMNS = ['Libellé article', 'Version', 'Code EDI', 'Prix Brut HT',
+                  'Remise (%)', 'Remise (€)', 'Prix Net HT', 'Prix net après remise',
+                  'Coeff', 'PPGC HT', 'PPGC TTC', 'RFA', 'Prix Net Net',
+                  'Marge brute (€)', 'Marge nette (€)', 'Taux de marque']
+
+# Formats numériques Excel prédéfinis (les pourcentages sont stockés de 0 à 100)
+EURO_FORMAT = '#,##0.00 "€"'
+NUMBER_FORMATS = {
+    'Prix Brut HT': EURO_FORMAT,
+    'Remise (%)': '0.0"%"',
+    'Remise (€)': EURO_FORMAT,
+    'Prix Net HT': EURO_FORMAT,
+    'Prix net après remise': EURO_FORMAT,
+    'Coeff': '0.00',
+    'PPGC HT': EURO_FORMAT,
+    'PPGC TTC': EURO_FORMAT,
+    'RFA': '0"%"',
+    'Prix Net Net': EURO_FORMAT,
+    'Marge brute (€)': EURO_FORMAT,
+    'Marge nette (€)': EURO_FORMAT,
+    'Taux de marque': '0.00"%"'
+}
+
+# Largeurs de colonnes (en caractères)
+COLUMN_WIDTHS = {'Libellé article': 40, 'Version': 12, 'Code EDI': 16}
+DEFAULT_COLUMN_WIDTH = 14
+
+# Nombre de lignes sérialisées par bloc (borne la mémoire utilisée par feuille)
+XLSX_CHUNK_ROWS = 20000
+
+# Parties fixes du paquet XLSX (SpreadsheetML minimal)
+_XML_HEADER = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+_NS_MAIN = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+_NS_REL = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+_NS_PKG_REL = 'http://schemas.openxmlformats.org/package/2006/relationships'
+_CT_PREFIX = 'application/vnd.openxmlformats-officedocument.spreadsheetml'
+
+# Caractères de contrôle interdits en XML 1.0 (retirés des textes)
+_ILLEGAL_XML_CHARS = r'[\x00-\x08\x0b\x0c\x0e-\x1f]'
+
+# Fonction pour obtenir un nom de feuille Excel valide et unique
+def _sheet_title(category, used_titles):
+    """Nettoie le nom de catégorie (31 caractères max, sans []:*?/\\)"""
+    title = str(category).strip() if pd.notna(category) else ''
+    for char in '[]:*?/\\':
+        title = title.replace(char, ' ')
+    title = title.strip()[:31] or UNCATEGORIZED_LABEL
+
+    # Éviter les doublons après troncature
+    base, suffix = title, 2
+    while title.lower() in used_titles:
+        tag = f" ({suffix})"
+        title = base[:31 - len(tag)] + tag
+        suffix += 1
+    used_titles.add(title.lower())
+    return title
+
+# Fonction pour lettre de colonne Excel (1 -> A, 27 -> AA)
+def _column_letter(col_idx):
+    letters = ''
+    while col_idx:
+        col_idx, remainder = divmod(col_idx - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+# Fonction pour construire la table des styles (un style par format numérique)
+def _styles_xml(columns):
+    """Renvoie (styles.xml, index de style par colonne) ; style 1 = en-tête en gras"""
+    formats = list(dict.fromkeys(NUMBER_FORMATS[col] for col in columns if col in NUMBER_FORMATS))
+    num_fmt_ids = {fmt: 164 + i for i, fmt in enumerate(formats)}
+    style_ids = {fmt: 2 + i for i, fmt in enumerate(formats)}
+
+    num_fmts = ''.join(f'<numFmt numFmtId="{num_fmt_ids[fmt]}" formatCode={quoteattr(fmt)}/>' for fmt in formats)
+    xfs = ''.join(f'<xf numFmtId="{num_fmt_ids[fmt]}" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+                  for fmt in formats)
+    xml = (
+        f'{_XML_HEADER}<styleSheet xmlns="{_NS_MAIN}">'
+        f'<numFmts count="{len(formats)}">{num_fmts}</numFmts>'
+        '<fonts count="2"><font><sz val="11"/><name val="Calibri"/></font>'
+        '<font><b/><sz val="11"/><name val="Calibri"/></font></fonts>'
+        '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+        '<fill><patternFill patternType="gray125"/></fill></fills>'
+        '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+        '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+        f'<cellXfs count="{2 + len(formats)}"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+        f'<xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" applyFont="1"/>{xfs}</cellXfs>'
+        '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+        '</styleSheet>'
+    )
+    column_styles = {col: style_ids[NUMBER_FORMATS[col]] for col in columns if col in NUMBER_FORMATS}
+    return xml, column_styles
+
+# Fonction pour extraire les valeurs numériques d'une colonne
+def _numeric_values(series):
+    """Valeurs Python natives (entiers conservés) ; NaN et infinis -> None (cellule vide)"""
+    if pd.api.types.is_integer_dtype(series):
+        return series.astype(object).where(series.notna(), None).tolist()
+    values = series.to_numpy(dtype=float, na_value=np.nan)
+    return [v if finite else None for v, finite in zip(values.tolist(), np.isfinite(values).tolist())]
+
+# Fonction pour savoir si une colonne est écrite en nombres
+def _is_numeric_column(series):
+    return pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series)
+
+# Fonction pour sérialiser un bloc de lignes (traitement colonne par colonne)
+def _rows_xml(df, columns, letters, column_styles, first_row):
+    """Renvoie le XML <row> d'un bloc du DataFrame, la première ligne portant le numéro first_row"""
+    row_numbers = [str(n) for n in range(first_row, first_row + len(df))]
+    column_cells = []
+    for col, letter in zip(columns, letters):
+        series = df[col]
+        if _is_numeric_column(series):
+            # repr() : écriture la plus courte qui relit exactement la valeur ; None -> cellule absente
+            style = column_styles.get(col, 0)
+            cells = [f'<c r="{letter}{n}" s="{style}"><v>{v!r}</v></c>' if v is not None else ''
+                     for n, v in zip(row_numbers, _numeric_values(series))]
+        else:
+            texts = (series.where(series.notna(), '').astype(str)
+                     .str.replace(_ILLEGAL_XML_CHARS, '', regex=True)
+                     .str.replace('&', '&amp;', regex=False)
+                     .str.replace('<', '&lt;', regex=False)
+                     .str.replace('>', '&gt;', regex=False))
+            cells = [f'<c r="{letter}{n}" t="inlineStr"><is><t xml:space="preserve">{t}</t></is></c>' if t else ''
+                     for n, t in zip(row_numbers, texts.tolist())]
+        column_cells.append(cells)
+    return ''.join(f'<row r="{n}">{"".join(cells)}</row>' for n, *cells in zip(row_numbers, *column_cells))
+
+# Fonction pour écrire une feuille en flux dans l'archive
+def _write_sheet_xml(zf, path, df, columns, column_styles):
+    """Écrit la feuille XML du DataFrame dans l'archive, bloc par bloc"""
+    letters = [_column_letter(i) for i in range(1, len(columns) + 1)]
+    cols = ''.join(
+        f'<col min="{i}" max="{i}" width="{COLUMN_WIDTHS.get(col, DEFAULT_COLUMN_WIDTH)}" customWidth="1"'
+        + (f' style="{column_styles[col]}"' if col in column_styles else '') + '/>'
+        for i, col in enumerate(columns, start=1)
+    )
+    header = ''.join(f'<c r="{letter}1" t="inlineStr" s="1"><is><t>{escape(col)}</t></is></c>'
+                     for letter, col in zip(letters, columns))
+
+    with zf.open(path, 'w') as stream:
+        stream.write((
+            f'{_XML_HEADER}<worksheet xmlns="{_NS_MAIN}" xmlns:r="{_NS_REL}">'
+            '<sheetViews><sheetView workbookViewId="0">'
+            '<pane ySplit="1" topLeftCell="A2" activePane="bottomLeft" state="frozen"/>'
+            '</sheetView></sheetViews>'
+            f'<cols>{cols}</cols><sheetData><row r="1">{header}</row>'
+        ).encode('utf-8'))
+        for start in range(0, len(df), XLSX_CHUNK_ROWS):
+            chunk = df.iloc[start:start + XLSX_CHUNK_ROWS]
+            stream.write(_rows_xml(chunk, columns, letters, column_styles, start + 2).encode('utf-8'))
+        stream.write(b'</sheetData></worksheet>')
+
+# Fonction pour découper le DataFrame en feuilles, une par catégorie
+def _category_sheets(df):
+    """Renvoie la liste (nom de feuille, DataFrame) à écrire"""
+    used_titles = set()
+    if 'Catégorie produit' in df.columns and not df.empty:
+        return [(_sheet_title(category, used_titles), cat_df)
+                for category, cat_df in df.groupby('Catégorie produit', sort=False, dropna=False)]
+    return [(_sheet_title('Proposition', used_titles), df)]
+
+# Fonction pour écrire une feuille openpyxl en flux
+def _write_sheet(wb, title, df, columns):
+    """Ajoute une feuille au classeur write-only et y écrit les lignes du DataFrame"""
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.utils import get_column_letter
+    
+    ws = wb.create_sheet(title=title)
+    ws.freeze_panes = 'A2'
+    for col_idx, col in enumerate(columns, start=1):
+        ws.column_dimensions[get_column_letter(col_idx)].width = COLUMN_WIDTHS.get(col, DEFAULT_COLUMN_WIDTH)
+    ws.append(columns)
+
+    # Une cellule modèle par colonne formatée : la ligne est sérialisée dès
+    # l'appel à append(), la même cellule peut donc être réutilisée ligne après ligne
+    templates = {}
+    for col in columns:
+        if col in NUMBER_FORMATS:
+            cell = WriteOnlyCell(ws)
+            cell.number_format = NUMBER_FORMATS[col]
+            templates[col] = cell
+
+    # Extraction par colonnes (types Python natifs, valeurs manquantes ou infinies -> cellule vide)
+    values = [_numeric_values(df[col]) if _is_numeric_column(df[col])
+              else df[col].astype(object).where(df[col].notna(), None).tolist()
+              for col in columns]
+    for row in zip(*values):
+        row_cells = []
+        for col, value in zip(columns, row):
+            cell = templates.get(col)
+            if cell is None:
+                row_cells.append(value)
+            else:
+                cell.value = value
+                row_cells.append(cell)
+        ws.append(row_cells)
+
+# Fonction pour exporter en XLSX (panier), une feuille par catégorie
+def export_xlsx(df, buffer, columns=None):
+    """Écrit le DataFrame tarifé dans buffer au format XLSX avec openpyxl (une feuille par catégorie)"""
+    from openpyxl import Workbook
+    
+    columns = [col for col in (columns or EXPORT_COLUMNS) if col in df.columns]
+    wb = Workbook(write_only=True)
+    for title, sheet_df in _category_sheets(df):
+        _write_sheet(wb, title, sheet_df, columns)
+    wb.save(buffer)
+
+# Fonction pour exporter en XLSX (tarif catalogue) avec l'écriture XML en flux
+def export_xlsx_streaming(df, buffer, columns=None):
+    """Écrit le DataFrame tarifé dans buffer au format XLSX, sans objet par cellule (gros volumes)"""
+    columns = [col for col in (columns or EXPORT_COLUMNS) if col in df.columns]
+    styles_xml, column_styles = _styles_xml(columns)
+    sheets = _category_sheets(df)
+
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_DEFLATED, compresslevel=1) as zf:
+        for number, (title, sheet_df) in enumerate(sheets, start=1):
+            _write_sheet_xml(zf, f'xl/worksheets/sheet{number}.xml', sheet_df, columns, column_styles)
+
+        sheet_numbers = range(1, len(sheets) + 1)
+        zf.writestr('[Content_Types].xml', (
+            f'{_XML_HEADER}<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            f'<Override PartName="/xl/workbook.xml" ContentType="{_CT_PREFIX}.sheet.main+xml"/>'
+            f'<Override PartName="/xl/styles.xml" ContentType="{_CT_PREFIX}.styles+xml"/>'
+            + ''.join(f'<Override PartName="/xl/worksheets/sheet{n}.xml" ContentType="{_CT_PREFIX}.worksheet+xml"/>'
+                      for n in sheet_numbers)
+            + '</Types>'
+        ))
+        zf.writestr('_rels/.rels', (
+            f'{_XML_HEADER}<Relationships xmlns="{_NS_PKG_REL}">'
+            f'<Relationship Id="rId1" Type="{_NS_REL}/officeDocument" Target="xl/workbook.xml"/>'
+            '</Relationships>'
+        ))
+        zf.writestr('xl/workbook.xml', (
+            f'{_XML_HEADER}<workbook xmlns="{_NS_MAIN}" xmlns:r="{_NS_REL}"><sheets>'
+            + ''.join(f'<sheet name={quoteattr(title)} sheetId="{n}" r:id="rId{n}"/>'
+                      for n, (title, _) in zip(sheet_numbers, sheets))
+            + '</sheets></workbook>'
+        ))
+        zf.writestr('xl/_rels/workbook.xml.rels', (
+            f'{_XML_HEADER}<Relationships xmlns="{_NS_PKG_REL}">'
+            + ''.join(f'<Relationship Id="rId{n}" Type="{_NS_REL}/worksheet" Target="worksheets/sheet{n}.xml"/>'
+                      for n in sheet_numbers)
+            + f'<Relationship Id="rId{len(sheets) + 1}" Type="{_NS_REL}/styles" Target="styles.xml"/>'
+            '</Relationships>'
+        ))
+        zf.writestr('xl/styles.xml', styles_xml)
+
+# Fonction pour exporter en CSV (format Excel français : ; et virgule décimale)
+def export_csv(df, columns=None):
+    """Renvoie le DataFrame tarifé au format CSV en octets"""
+    columns = [col for col in ['Catégorie produit'] + (columns or EXPORT_COLUMNS) if col in df.columns]
+    return df[columns].to_csv(sep=';', decimal=',', index=False, float_format='%.2f').encode('utf-8-sig')
+
+# Point d'entrée des processus de travail : tarification + export du tarif catalogue
+def render_price_list_xlsx(df, rounding=DEFAULT_ROUNDING):
+    """Recalcule le catalogue et renvoie le tarif au format XLSX en octets"""
+    buffer = BytesIO()
+    export_xlsx_streaming(calculate_derived_values(df, rounding), buffer)
+    return buffer.getvalue()
@@ -0,0 +1,483 @@
+import pandas as pd
+import numpy as np
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+from io import BytesIO
+from datetime import datetime
+
+# Calculs et rendu PDF des propositions, sans dépendance à Streamlit :
+# ce module est importé par script.py et par les processus de travail.
+# ReportLab n'est importé qu'à la première génération de PDF (démarrage plus rapide).
+
+# Règles d'arrondi des prix (libellé affiché -> règle appliquée au centime)
+ROUNDING_MODES = {
+    "Au centime (demi supérieur)": "half_up",
+    "Au centime (bancaire)": "half_even",
+    "Sans arrondi (flottant)": None
+}
+DEFAULT_ROUNDING = "half_up"
+
+# Taux de TVA en % (entier : le TTC est calculé exactement en centimes)
+TVA_PCT = 20
+
+# Colonnes monétaires converties en centimes entiers
+CENTS_INPUT_COLUMNS = ['Prix Brut HT', 'Prix Net HT', 'Remise (€)', 'Remise autre (€)']
+
+# Fonction pour arrondir en lot des montants exprimés en centimes
+def round_cents(values, rounding=DEFAULT_ROUNDING):
+    """Arrondit un tableau de centimes (float) en entiers int64 selon la règle choisie"""
+    # Absorbe le bruit binaire (ex. 2.675 * 100 = 267.49999...) avant l'arrondi
+    values = np.round(np.asarray(values, dtype=float), 6)
+    if rounding == "half_even":
+        return np.round(values).astype(np.int64)
+    # half_up : les demi-centimes s'éloignent de zéro (arrondi commercial)
+    return (np.sign(values) * np.floor(np.abs(values) + 0.5)).astype(np.int64)
+
+# Fonction pour calculer les valeurs dérivées
+def calculate_derived_values(df, rounding=DEFAULT_ROUNDING):
+    """Calcule les valeurs dérivées - NOUVELLE LOGIQUE (vectorisée, par colonnes)
+    
+    rounding : règle d'arrondi au centime ("half_up", "half_even") ou None pour
+    le calcul historique en flottants sans arrondi.
+    """
+    if rounding is not None:
+        return _calculate_derived_values_cents(df, rounding)
+    
+    df = df.copy()
+    
+    # LOGIQUE MODIFIÉE : La remise est calculée à partir du Prix Brut HT
+    # Si Remise (%) est renseignée, calculer Remise (€) à partir du Prix Brut HT
+    remise_pct = df['Remise (%)']
+    has_pct = remise_pct.notna() & (remise_pct != 0)
+    df['Remise (€)'] = df['Remise (€)'].where(~has_pct, df['Prix Brut HT'] * remise_pct / 100)
+    
+    # Calcul Prix net après remise (colonne I)
+    # Prix Net HT reste tel quel (colonne du fichier Excel)
+    # Prix net après remise = Prix Net HT - Remise (€) - Remise autre (€)
+    df['Prix net après remise'] = df['Prix Net HT'] - df['Remise (€)'] - df['Remise autre (€)'].fillna(0)
+    
+    # Calcul PPGC HT (colonne K)
+    # =I2*J2 (si Coeff est renseigné)
+    coeff = df['Coeff']
+    has_coeff = coeff.notna() & (coeff != 0)
+    df['PPGC HT'] = (df['Prix net après remise'] * coeff).where(has_coeff, 0.0)
+    
+    # Calcul PPGC TTC (on ajoute la TVA de 20%)
+    df['PPGC TTC'] = df['PPGC HT'] * 1.20
+    
+    # Calcul Prix Net Net (colonne Q)
+    # =I2-(I2*P2) où P2 est en pourcentage
+    rfa = df['RFA']
+    has_rfa = rfa.notna() & (rfa != 0)
+    prix_apres_remise = df['Prix net après remise']
+    df['Prix Net Net'] = (prix_apres_remise - prix_apres_remise * rfa / 100).where(has_rfa, prix_apres_remise)
+    
+    # Calcul des marges
+    df['Marge brute (€)'] = df['PPGC HT'] - df['Prix Brut HT']
+    df['Marge nette (€)'] = df['PPGC HT'] - df['Prix net après remise']
+    
+    # Calcul Taux de marque
+    ppgc_ht = df['PPGC HT']
+    df['Taux de marque'] = (df['Marge nette (€)'] / ppgc_ht.where(ppgc_ht != 0) * 100).where(ppgc_ht != 0, 0.0)
+    
+    return df
+
+# Noyau de tarification en centimes entiers (int64), même logique que le calcul flottant
+def _calculate_derived_values_cents(df, rounding):
+    """Calcule les valeurs dérivées au centime près : chaque étape est arrondie en lot,
+    les sommes et différences sont exactes. Les valeurs manquantes comptent pour 0."""
+    df = df.copy()
+    cents = {col: round_cents(df[col].fillna(0).to_numpy(dtype=float) * 100, rounding)
+             for col in CENTS_INPUT_COLUMNS}
+    remise_pct = df['Remise (%)'].fillna(0).to_numpy(dtype=float)
+    coeff = df['Coeff'].fillna(0).to_numpy(dtype=float)
+    rfa = df['RFA'].fillna(0).to_numpy(dtype=float)
+    
+    # Remise (€) recalculée à partir du Prix Brut HT si Remise (%) est renseignée
+    remise = np.where(remise_pct != 0, round_cents(cents['Prix Brut HT'] * remise_pct / 100, rounding),
+                      cents['Remise (€)'])
+    
+    # Prix net après remise = Prix Net HT - Remise (€) - Remise autre (€)
+    prix_apres_remise = cents['Prix Net HT'] - remise - cents['Remise autre (€)']
+    
+    # PPGC HT (si Coeff est renseigné) et PPGC TTC
+    ppgc_ht = np.where(coeff != 0, round_cents(prix_apres_remise * coeff, rounding), 0)
+    ppgc_ttc = round_cents(ppgc_ht * (100 + TVA_PCT) / 100, rounding)
+    
+    # Prix Net Net = Prix après remise - RFA
+    prix_net_net = prix_apres_remise - np.where(rfa != 0, round_cents(prix_apres_remise * rfa / 100, rounding), 0)
+    
+    # Marges (différences exactes en centimes)
+    marge_brute = ppgc_ht - cents['Prix Brut HT']
+    marge_nette = ppgc_ht - prix_apres_remise
+    
+    # Retour en euros (valeurs exactes au centime)
+    df['Remise (€)'] = remise / 100
+    df['Prix net après remise'] = prix_apres_remise / 100
+    df['PPGC HT'] = ppgc_ht / 100
+    df['PPGC TTC'] = ppgc_ttc / 100
+    df['Prix Net Net'] = prix_net_net / 100
+    df['Marge brute (€)'] = marge_brute / 100
+    df['Marge nette (€)'] = marge_nette / 100
+    
+    # Taux de marque (ratio, non arrondi)
+    taux = np.zeros(len(df))
+    np.divide(marge_nette * 100, ppgc_ht, out=taux, where=ppgc_ht != 0)
+    df['Taux de marque'] = taux
+    
+    return df
+
+# Montants additionnés dans la synthèse (une ligne du panier = un article)
+SUMMARY_SUM_COLUMNS = ['Prix net après remise', 'PPGC HT', 'PPGC TTC', 'Prix Net Net',
+                       'Marge brute (€)', 'Marge nette (€)']
+SUMMARY_TOTAL_LABEL = "Total proposition"
+UNCATEGORIZED_LABEL = "Sans catégorie"
+
+# Fonction pour ajouter les moyennes calculées sur les sommes (taux pondéré, prix moyen)
+def _add_summary_ratios(summary):
+    """Arrondit les sommes et ajoute taux de marque pondéré et Prix Net Net moyen"""
+    summary[SUMMARY_SUM_COLUMNS] = summary[SUMMARY_SUM_COLUMNS].round(2)
+    ppgc_ht = summary['PPGC HT']
+    summary['Taux de marque pondéré'] = (summary['Marge nette (€)'] / ppgc_ht.where(ppgc_ht != 0) * 100).fillna(0.0)
+    summary['Prix Net Net moyen'] = (summary['Prix Net Net'] / summary['Articles'].where(summary['Articles'] != 0)).fillna(0.0)
+    return summary
+
+# Fonction pour calculer la synthèse de la proposition (totaux et analyses)
+def aggregate_proposal(df):
+    """Renvoie (par catégorie, total) à partir du panier tarifé.
+    
+    Une seule réduction groupby produit, par catégorie : nombre d'articles, sommes des
+    montants et distribution des taux de marque (min / médian / max). Le total est une
+    Series séparée (mêmes colonnes), pour ne pas entrer en conflit avec un nom de catégorie.
+    Les catégories vides ou manquantes sont regroupées sous "Sans catégorie".
+    """
+    work = df[SUMMARY_SUM_COLUMNS + ['Taux de marque']].copy()
+    if 'Catégorie produit' in df.columns:
+        categories = df['Catégorie produit']
+        categories = categories.where(categories.notna(), '').astype(str).str.strip()
+        work['Catégorie produit'] = categories.replace('', UNCATEGORIZED_LABEL)
+    else:
+        work['Catégorie produit'] = UNCATEGORIZED_LABEL
+    
+    aggregations = {
+        'Articles': ('Taux de marque', 'size'),
+        **{col: (col, 'sum') for col in SUMMARY_SUM_COLUMNS},
+        'Taux de marque min': ('Taux de marque', 'min'),
+        'Taux de marque médian': ('Taux de marque', 'median'),
+        'Taux de marque max': ('Taux de marque', 'max')
+    }
+    by_category = work.groupby('Catégorie produit', sort=False).agg(**aggregations)
+    
+    # Total : sommes des sous-totaux, distribution sur l'ensemble des lignes
+    total = by_category[['Articles'] + SUMMARY_SUM_COLUMNS].sum()
+    total['Taux de marque min'] = work['Taux de marque'].min()
+    total['Taux de marque médian'] = work['Taux de marque'].median()
+    total['Taux de marque max'] = work['Taux de marque'].max()
+    total = _add_summary_ratios(total.to_frame(SUMMARY_TOTAL_LABEL).T).iloc[0]
+    
+    return _add_summary_ratios(by_category), total
+
+# Cache LRU des données de tableau par catégorie (clé : contenu des lignes + modes de remise)
+SECTION_CACHE_SIZE = 64
+_section_cache = OrderedDict()
+_section_cache_lock = threading.Lock()
+
+# Colonnes lues pour construire le tableau d'une catégorie
+SECTION_COLUMNS = ['Libellé article', 'Version', 'Remise (%)', 'Remise (€)', 'Prix Net HT',
+                   'Prix net après remise', 'PPGC TTC', 'Marge nette (€)', 'RFA', 'Prix Net Net']
+
+# Fonction pour calculer la clé de cache d'une section
+def _section_key(cat_df, remise_modes):
+    """Empreinte des lignes de la catégorie (index compris) et de leurs modes de remise"""
+    digest = hashlib.sha1(pd.util.hash_pandas_object(cat_df[SECTION_COLUMNS], index=True).values.tobytes())
+    # None = remise_modes non fourni (les deux colonnes de remise sont affichées)
+    modes = tuple(remise_modes.get(idx, "En %") for idx in cat_df.index) if remise_modes else None
+    digest.update(repr(modes).encode())
+    return digest.hexdigest()
+
+# Fonction pour construire les données du tableau d'une catégorie (mémoïsée)
+def build_category_table_data(cat_df, remise_modes=None):
+    """Renvoie (lignes du tableau, largeurs de colonnes), mises en cache par contenu de catégorie.
+    
+    Seul le formatage des lignes est évité pour les catégories inchangées : les Paragraph,
+    Table et la mise en page (doc.build) restent refaits à chaque génération."""
+    key = _section_key(cat_df, remise_modes)
+    # Les sessions Streamlit sont des threads : lecture / insertion / éviction sous verrou
+    with _section_cache_lock:
+        section = _section_cache.get(key)
+        if section is not None:
+            _section_cache.move_to_end(key)
+            return section
+    
+    # Construction hors verrou : deux threads peuvent calculer la même section, sans conséquence
+    section = _build_category_table_data(cat_df, remise_modes)
+    with _section_cache_lock:
+        _section_cache[key] = section
+        _section_cache.move_to_end(key)
+        while len(_section_cache) > SECTION_CACHE_SIZE:
+            _section_cache.popitem(last=False)
+    return section
+
+def _build_category_table_data(cat_df, remise_modes):
+    """Construit l'en-tête, les lignes formatées et les largeurs de colonnes d'une catégorie"""
+    from reportlab.lib.units import cm
+    
+    # En-tête du tableau - adaptatif selon les modes de remise
+    table_header = ['Libellé article', 'Version']
+    
+    # Déterminer si on doit afficher les colonnes de remise
+    show_remise_pct = False
+    show_remise_euros = False
+    
+    if remise_modes:
+        for idx in cat_df.index:
+            mode = remise_modes.get(idx, "En %")
+            if mode == "En %":
+                show_remise_pct = True
+            else:
+                show_remise_euros = True
+    else:
+        # Par défaut, afficher les deux si remise_modes n'est pas fourni
+        show_remise_pct = True
+        show_remise_euros = True
+    
+    # Construire l'en-tête dynamiquement
+    if show_remise_pct:
+        table_header.append('Remise (%)')
+    if show_remise_euros:
+        table_header.append('Remise (€)')
+    
+    table_header.extend(['Prix Net HT', 'Prix après remise', 'PPGC TTC', 'Marge nette', 'RFA', 'Prix Net Net'])
+    
+    table_data = [table_header]
+    
+    # Largeurs de colonnes adaptatives
+    col_widths = [3*cm, 1.8*cm]
+    if show_remise_pct:
+        col_widths.append(1.5*cm)
+    if show_remise_euros:
+        col_widths.append(1.5*cm)
+    col_widths.extend([2*cm, 2.5*cm, 2*cm, 2*cm, 1.5*cm, 2*cm])
+    
+    for idx, row in cat_df.iterrows():
+        # Le libellé reste du texte : le Paragraph (wrapping) est créé au rendu
+        row_data = [str(row['Libellé article']), str(row['Version'])]
+        
+        # Récupérer le mode pour cet article
+        mode = remise_modes.get(idx, "En %") if remise_modes else "En %"
+        
+        # Ajouter les colonnes de remise selon le mode et ce qui doit être affiché
+        if show_remise_pct:
+            if mode == "En %":
+                # Utiliser directement la valeur de Remise (%) stockée
+                remise_pct = row['Remise (%)']
+                row_data.append(f"{remise_pct:.1f}%" if remise_pct > 0 else "-")
+            else:
+                row_data.append("-")
+        
+        if show_remise_euros:
+            if mode == "En €":
+                # Utiliser directement la valeur de Remise (€) stockée
+                row_data.append(f"{row['Remise (€)']:.2f}€" if row['Remise (€)'] > 0 else "-")
+            else:
+                row_data.append("-")
+        
+        # Ajouter les autres colonnes
+        row_data.extend([
+            f"{row['Prix Net HT']:.2f}€",
+            f"{row['Prix net après remise']:.2f}€",
+            f"{row['PPGC TTC']:.2f}€",
+            f"{row['Marge nette (€)']:.2f}€",
+            f"{row['RFA']:.0f}%" if pd.notna(row['RFA']) and row['RFA'] != 0 else "-",
+            f"{row['Prix Net Net']:.2f}€"
+        ])
+        
+        table_data.append(row_data)
+    
+    return table_data, col_widths
+
+# Fonction pour générer le PDF amélioré
+def generate_pdf(df, proposal_number, buffer, client_info=None, remise_modes=None, summary=None):
+    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Image, PageBreak
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib import colors
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.lib.units import cm
+    
+    doc = SimpleDocTemplate(buffer, pagesize=A4, topMargin=2*cm, bottomMargin=2*cm)
+    styles = getSampleStyleSheet()
+    story = []
+    
+    # Logo (si disponible)
+    logo_path = "mont-royal-logo.jpg"
+    if os.path.exists(logo_path):
+        try:
+            img = Image(logo_path, width=5*cm, height=3*cm)
+            img.hAlign = 'CENTER'
+            story.append(img)
+            story.append(Spacer(1, 12))
+        except:
+            pass
+    
+    # En-tête avec style amélioré
+    title_style = ParagraphStyle(
+        'CustomTitle',
+        parent=styles['Title'],
+        fontSize=24,
+        alignment=1,
+        textColor=colors.HexColor("#f68b1f"),
+        spaceAfter=20,
+        fontName='Helvetica-Bold'
+    )
+    
+    story.append(Paragraph("Proposition Commerciale", title_style))
+    story.append(Paragraph("Mont-Royal - Manufacture française d'optique", styles['Heading3']))
+    story.append(Spacer(1, 20))
+    
+    # Informations de la proposition
+    info_style = ParagraphStyle(
+        'InfoStyle',
+        parent=styles['Normal'],
+        fontSize=12,
+        leftIndent=0,
+        rightIndent=0,
+        spaceAfter=6
+    )
+    
+    story.append(Paragraph(f"<b>N° de proposition :</b> {proposal_number}", info_style))
+    story.append(Paragraph(f"<b>Date :</b> {datetime.now().strftime('%d/%m/%Y à %H:%M')}", info_style))
+    
+    if client_info:
+        story.append(Paragraph(f"<b>Client :</b> {client_info}", info_style))
+    
+    story.append(Spacer(1, 20))
+    
+    # Traitement par catégorie
+    categories = df['Catégorie produit'].unique()
+    for category in categories:
+        cat_df = df[df['Catégorie produit'] == category]
+        if not cat_df.empty:
+            # Titre de catégorie
+            category_style = ParagraphStyle(
+                'CategoryStyle',
+                parent=styles['Heading2'],
+                fontSize=16,
+                textColor=colors.HexColor("#2c3e50"),
+                spaceAfter=12,
+                borderWidth=1,
+                borderColor=colors.HexColor("#f68b1f"),
+                borderPadding=8,
+                backColor=colors.HexColor("#fff5f0")
+            )
+            
+            story.append(Paragraph(f"Catégorie : {category}", category_style))
+            story.append(Spacer(1, 10))
+            
+            # Données du tableau (mises en cache par catégorie) - adaptatives selon les modes de remise
+            cached_data, col_widths = build_category_table_data(cat_df, remise_modes)
+            
+            # Gestion du wrapping pour les libellés longs
+            table_data = [list(cached_data[0])] + [
+                [Paragraph(row[0], styles['Normal'])] + row[1:] for row in cached_data[1:]
+            ]
+            
+            # Création du tableau avec largeurs adaptées
+            table = Table(table_data, colWidths=col_widths)
+            table.setStyle(TableStyle([
+                # En-tête
+                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor("#f68b1f")),
+                ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+                ('FONTSIZE', (0, 0), (-1, 0), 8),
+                ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
+                ('VALIGN', (0, 0), (-1, 0), 'MIDDLE'),
+                
+                # Corps du tableau
+                ('BACKGROUND', (0, 1), (-1, -1), colors.white),
+                ('TEXTCOLOR', (0, 1), (-1, -1), colors.black),
+                ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+                ('FONTSIZE', (0, 1), (-1, -1), 7),
+                ('ALIGN', (0, 1), (-1, -1), 'CENTER'),
+                ('VALIGN', (0, 1), (-1, -1), 'MIDDLE'),
+                
+                # Bordures
+                ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+                ('LINEBELOW', (0, 0), (-1, 0), 2, colors.HexColor("#f68b1f")),
+                
+                # Alternance de couleurs
+                ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor("#f8f9fa")]),
+            ]))
+            
+            story.append(table)
+            story.append(Spacer(1, 15))
+    
+    # Page de synthèse (totaux par catégorie et pour la proposition)
+    if summary is not None and not summary[0].empty:
+        by_category, total = summary
+        story.append(PageBreak())
+        story.append(Paragraph("Synthèse de la proposition", title_style))
+        story.append(Spacer(1, 10))
+        
+        summary_data = [['Catégorie', 'Articles', 'Prix Net Net', 'PPGC HT', 'Marge nette',
+                         'Taux de marque', 'Taux min - max']]
+        rows = [(str(category), row) for category, row in by_category.iterrows()]
+        rows.append((f"<b>{SUMMARY_TOTAL_LABEL}</b>", total))
+        for label, row in rows:
+            summary_data.append([
+                Paragraph(label, styles['Normal']),
+                f"{row['Articles']:.0f}",
+                f"{row['Prix Net Net']:.2f}€",
+                f"{row['PPGC HT']:.2f}€",
+                f"{row['Marge nette (€)']:.2f}€",
+                f"{row['Taux de marque pondéré']:.1f}%",
+                f"{row['Taux de marque min']:.1f}% - {row['Taux de marque max']:.1f}%"
+            ])
+        
+        summary_table = Table(summary_data, colWidths=[3.8*cm, 1.4*cm, 2.3*cm, 2.3*cm, 2.3*cm, 1.8*cm, 2.3*cm])
+        summary_table.setStyle(TableStyle([
+            # En-tête
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor("#f68b1f")),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 8),
+            ('ALIGN', (1, 0), (-1, -1), 'CENTER'),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+            
+            # Bordures et alternance de couleurs
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+            ('LINEBELOW', (0, 0), (-1, 0), 2, colors.HexColor("#f68b1f")),
+            ('ROWBACKGROUNDS', (0, 1), (-1, -2), [colors.white, colors.HexColor("#f8f9fa")]),
+            
+            # Ligne de total
+            ('BACKGROUND', (0, -1), (-1, -1), colors.HexColor("#fff5f0")),
+            ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
+            ('LINEABOVE', (0, -1), (-1, -1), 1.5, colors.HexColor("#f68b1f")),
+        ]))
+        story.append(summary_table)
+    
+    # Pied de page
+    story.append(Spacer(1, 30))
+    footer_style = ParagraphStyle(
+        'FooterStyle',
+        parent=styles['Normal'],
+        fontSize=10,
+        alignment=1,
+        textColor=colors.grey,
+        spaceAfter=6
+    )
+    
+    story.append(Paragraph("Mont-Royal - Manufacture française d'optique", footer_style))
+    story.append(Paragraph("Cette proposition est valable 30 jours à compter de la date d'émission", footer_style))
+    
+    # Construction du PDF
+    doc.build(story)
+
+# Point d'entrée des processus de travail : tarification + PDF en une tâche
+def render_pdf_bytes(df, proposal_number, client_info=None, remise_modes=None, rounding=DEFAULT_ROUNDING):
+    """Recalcule le panier et renvoie le PDF de la proposition en octets"""
+    buffer = BytesIO()
+    priced_df = calculate_derived_values(df, rounding)
+    generate_pdf(priced_df, proposal_number, buffer, client_info, remise_modes, aggregate_proposal(priced_df))
+    return buffer.getvalue()
@@ -3,14 +3,21 @@ import pandas as pd
 import numpy as np
 import os
 from io import BytesIO
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Image
-from reportlab.lib.pagesizes import A4
-from reportlab.lib import colors
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import cm
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime
-from st_aggrid import AgGrid, GridOptionsBuilder, GridUpdateMode, JsCode
 import base64
+from proposition import calculate_derived_values, aggregate_proposal, render_pdf_bytes, ROUNDING_MODES, DEFAULT_ROUNDING, SUMMARY_TOTAL_LABEL
+from export import export_xlsx, export_csv, render_price_list_xlsx
+
+# Imports différés (premier usage) : st_aggrid à l'affichage de la grille,
+# ReportLab à la première génération de PDF (openpyxl n'est chargé que par pd.read_excel)
+
+# Nombre de processus de travail pour la tarification et les PDF
+# (0 = génération dans le processus Streamlit, comportement historique)
+WORKER_PROCESSES = int(os.environ.get("SIMULATEUR_WORKERS", "0"))
 
 # Configuration de la page
 st.set_page_config(
@@ -77,242 +84,6 @@ def get_base64_image(image_path):
             return base64.b64encode(img_file.read()).decode()
     return None
 
-# Fonction pour calculer les valeurs dérivées
-def calculate_derived_values(df):
-    """Calcule les valeurs dérivées - NOUVELLE LOGIQUE"""
-    df = df.copy()
-    
-    # LOGIQUE MODIFIÉE : La remise est calculée à partir du Prix Brut HT
-    # Si Remise (%) est renseignée, calculer Remise (€) à partir du Prix Brut HT
-    for idx in df.index:
-        if pd.notna(df.loc[idx, 'Remise (%)']) and df.loc[idx, 'Remise (%)'] != 0:
-            df.loc[idx, 'Remise (€)'] = df.loc[idx, 'Prix Brut HT'] * df.loc[idx, 'Remise (%)'] / 100
-    
-    # Calcul Prix net après remise (colonne I)
-    # Prix Net HT reste tel quel (colonne du fichier Excel)
-    # Prix net après remise = Prix Net HT - Remise (€) - Remise autre (€)
-    df['Prix net après remise'] = df.apply(lambda row: 
-        row['Prix Net HT'] - row['Remise (€)'] - (row['Remise autre (€)'] if pd.notna(row['Remise autre (€)']) else 0),
-        axis=1)
-    
-    # Calcul PPGC HT (colonne K)
-    # =I2*J2 (si Coeff est renseigné)
-    df['PPGC HT'] = df.apply(lambda row:
-        row['Prix net après remise'] * row['Coeff'] if pd.notna(row['Coeff']) and row['Coeff'] != 0
-        else 0, axis=1)
-    
-    # Calcul PPGC TTC (on ajoute la TVA de 20%)
-    df['PPGC TTC'] = df['PPGC HT'] * 1.20
-    
-    # Calcul Prix Net Net (colonne Q)
-    # =I2-(I2*P2) où P2 est en pourcentage
-    df['Prix Net Net'] = df.apply(lambda row:
-        row['Prix net après remise'] - (row['Prix net après remise'] * row['RFA'] / 100) if pd.notna(row['RFA']) and row['RFA'] != 0
-        else row['Prix net après remise'], axis=1)
-    
-    # Calcul des marges
-    df['Marge brute (€)'] = df['PPGC HT'] - df['Prix Brut HT']
-    df['Marge nette (€)'] = df['PPGC HT'] - df['Prix net après remise']
-    
-    # Calcul Taux de marque
-    df['Taux de marque'] = df.apply(lambda row:
-        (row['Marge nette (€)'] / row['PPGC HT']) * 100 if row['PPGC HT'] != 0 else 0, axis=1)
-    
-    return df
-
-# Fonction pour générer le PDF amélioré
-def generate_pdf(df, proposal_number, buffer, client_info=None, remise_modes=None):
-    doc = SimpleDocTemplate(buffer, pagesize=A4, topMargin=2*cm, bottomMargin=2*cm)
-    styles = getSampleStyleSheet()
-    story = []
-    
-    # Logo (si disponible)
-    logo_path = "mont-royal-logo.jpg"
-    if os.path.exists(logo_path):
-        try:
-            img = Image(logo_path, width=5*cm, height=3*cm)
-            img.hAlign = 'CENTER'
-            story.append(img)
-            story.append(Spacer(1, 12))
-        except:
-            pass
-    
-    # En-tête avec style amélioré
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Title'],
-        fontSize=24,
-        alignment=1,
-        textColor=colors.HexColor("#f68b1f"),
-        spaceAfter=20,
-        fontName='Helvetica-Bold'
-    )
-    
-    story.append(Paragraph("Proposition Commerciale", title_style))
-    story.append(Paragraph("Mont-Royal - Manufacture française d'optique", styles['Heading3']))
-    story.append(Spacer(1, 20))
-    
-    # Informations de la proposition
-    info_style = ParagraphStyle(
-        'InfoStyle',
-        parent=styles['Normal'],
-        fontSize=12,
-        leftIndent=0,
-        rightIndent=0,
-        spaceAfter=6
-    )
-    
-    story.append(Paragraph(f"<b>N° de proposition :</b> {proposal_number}", info_style))
-    story.append(Paragraph(f"<b>Date :</b> {datetime.now().strftime('%d/%m/%Y à %H:%M')}", info_style))
-    
-    if client_info:
-        story.append(Paragraph(f"<b>Client :</b> {client_info}", info_style))
-    
-    story.append(Spacer(1, 20))
-    
-    # Traitement par catégorie
-    categories = df['Catégorie produit'].unique()
-    for category in categories:
-        cat_df = df[df['Catégorie produit'] == category]
-        if not cat_df.empty:
-            # Titre de catégorie
-            category_style = ParagraphStyle(
-                'CategoryStyle',
-                parent=styles['Heading2'],
-                fontSize=16,
-                textColor=colors.HexColor("#2c3e50"),
-                spaceAfter=12,
-                borderWidth=1,
-                borderColor=colors.HexColor("#f68b1f"),
-                borderPadding=8,
-                backColor=colors.HexColor("#fff5f0")
-            )
-            
-            story.append(Paragraph(f"Catégorie : {category}", category_style))
-            story.append(Spacer(1, 10))
-            
-            # En-tête du tableau - adaptatif selon les modes de remise
-            table_header = ['Libellé article', 'Version']
-            
-            # Déterminer si on doit afficher les colonnes de remise
-            show_remise_pct = False
-            show_remise_euros = False
-            
-            if remise_modes:
-                for idx in cat_df.index:
-                    mode = remise_modes.get(idx, "En %")
-                    if mode == "En %":
-                        show_remise_pct = True
-                    else:
-                        show_remise_euros = True
-            else:
-                # Par défaut, afficher les deux si remise_modes n'est pas fourni
-                show_remise_pct = True
-                show_remise_euros = True
-            
-            # Construire l'en-tête dynamiquement
-            if show_remise_pct:
-                table_header.append('Remise (%)')
-            if show_remise_euros:
-                table_header.append('Remise (€)')
-            
-            table_header.extend(['Prix Net HT', 'Prix après remise', 'PPGC TTC', 'Marge nette', 'RFA', 'Prix Net Net'])
-            
-            table_data = [table_header]
-            
-            # Largeurs de colonnes adaptatives
-            col_widths = [3*cm, 1.8*cm]
-            if show_remise_pct:
-                col_widths.append(1.5*cm)
-            if show_remise_euros:
-                col_widths.append(1.5*cm)
-            col_widths.extend([2*cm, 2.5*cm, 2*cm, 2*cm, 1.5*cm, 2*cm])
-            
-            for idx, row in cat_df.iterrows():
-                # Gestion du wrapping pour les libellés longs
-                libelle_para = Paragraph(str(row['Libellé article']), styles['Normal'])
-                
-                # Construction de la ligne selon le mode de remise
-                row_data = [libelle_para, str(row['Version'])]
-                
-                # Récupérer le mode pour cet article
-                mode = remise_modes.get(idx, "En %") if remise_modes else "En %"
-                
-                # Ajouter les colonnes de remise selon le mode et ce qui doit être affiché
-                if show_remise_pct:
-                    if mode == "En %":
-                        # Utiliser directement la valeur de Remise (%) stockée
-                        remise_pct = row['Remise (%)']
-                        row_data.append(f"{remise_pct:.1f}%" if remise_pct > 0 else "-")
-                    else:
-                        row_data.append("-")
-                
-                if show_remise_euros:
-                    if mode == "En €":
-                        # Utiliser directement la valeur de Remise (€) stockée
-                        row_data.append(f"{row['Remise (€)']:.2f}€" if row['Remise (€)'] > 0 else "-")
-                    else:
-                        row_data.append("-")
-                
-                # Ajouter les autres colonnes
-                row_data.extend([
-                    f"{row['Prix Net HT']:.2f}€",
-                    f"{row['Prix net après remise']:.2f}€",
-                    f"{row['PPGC TTC']:.2f}€",
-                    f"{row['Marge nette (€)']:.2f}€",
-                    f"{row['RFA']:.0f}%" if pd.notna(row['RFA']) and row['RFA'] != 0 else "-",
-                    f"{row['Prix Net Net']:.2f}€"
-                ])
-                
-                table_data.append(row_data)
-            
-            # Création du tableau avec largeurs adaptées
-            table = Table(table_data, colWidths=col_widths)
-            table.setStyle(TableStyle([
-                # En-tête
-                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor("#f68b1f")),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 8),
-                ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
-                ('VALIGN', (0, 0), (-1, 0), 'MIDDLE'),
-                
-                # Corps du tableau
-                ('BACKGROUND', (0, 1), (-1, -1), colors.white),
-                ('TEXTCOLOR', (0, 1), (-1, -1), colors.black),
-                ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-                ('FONTSIZE', (0, 1), (-1, -1), 7),
-                ('ALIGN', (0, 1), (-1, -1), 'CENTER'),
-                ('VALIGN', (0, 1), (-1, -1), 'MIDDLE'),
-                
-                # Bordures
-                ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-                ('LINEBELOW', (0, 0), (-1, 0), 2, colors.HexColor("#f68b1f")),
-                
-                # Alternance de couleurs
-                ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor("#f8f9fa")]),
-            ]))
-            
-            story.append(table)
-            story.append(Spacer(1, 15))
-    
-    # Pied de page
-    story.append(Spacer(1, 30))
-    footer_style = ParagraphStyle(
-        'FooterStyle',
-        parent=styles['Normal'],
-        fontSize=10,
-        alignment=1,
-        textColor=colors.grey,
-        spaceAfter=6
-    )
-    
-    story.append(Paragraph("Mont-Royal - Manufacture française d'optique", footer_style))
-    story.append(Paragraph("Cette proposition est valable 30 jours à compter de la date d'émission", footer_style))
-    
-    # Construction du PDF
-    doc.build(story)
-
 # Fonction pour charger les données par défaut
 def load_default_data():
     """Charge automatiquement un fichier Excel s'il existe"""
@@ -320,13 +91,79 @@ def load_default_data():
     for filename in default_files:
         if os.path.exists(filename):
             try:
-                df = pd.read_excel(filename)
-                return initialize_dataframe_columns(df)
+                # Lecture partagée entre sessions, relue dès que le fichier change sur disque
+                return load_shared_catalogue(os.path.abspath(filename), os.path.getmtime(filename))
             except Exception as e:
                 st.error(f"Erreur lors du chargement de {filename}: {str(e)}")
                 continue
     return pd.DataFrame()
 
+# Catalogue par défaut lu une seule fois par version du fichier (chemin + date de modification)
+# et partagé en lecture seule entre toutes les sessions. Une erreur de lecture n'est pas mise en cache.
+@st.cache_resource(show_spinner="Chargement du catalogue...", max_entries=4)
+def load_shared_catalogue(path, mtime):
+    """Renvoie le catalogue du fichier path, commun à toutes les sessions"""
+    return initialize_dataframe_columns(pd.read_excel(path))
+
+# Synthèse de la proposition, mise en cache avec l'état du panier tarifé
+@st.cache_data(show_spinner=False, max_entries=256)
+def compute_proposal_summary(display_df):
+    """Totaux par catégorie et pour la proposition, recalculés seulement si le panier change"""
+    return aggregate_proposal(display_df)
+
+# Pool de processus partagé par toutes les sessions pour les calculs lourds
+@st.cache_resource
+def get_worker_pool():
+    """Renvoie le pool de processus de travail, ou None en mode mono-processus"""
+    if WORKER_PROCESSES <= 0:
+        return None
+    # 'spawn' : les processus n'héritent pas des threads du serveur Streamlit
+    return ProcessPoolExecutor(
+        max_workers=WORKER_PROCESSES,
+        mp_context=multiprocessing.get_context("spawn")
+    )
+
+# Verrou de remplacement du pool (ressource partagée : script.py est réexécuté à chaque run)
+@st.cache_resource
+def get_worker_pool_lock():
+    return threading.Lock()
+
+# Fonction pour exécuter une tâche lourde dans un processus de travail si disponible
+def run_in_worker(func, *args):
+    """Exécute func(*args) dans le pool ; le pool est recréé s'il est cassé (processus tué).
+    
+    La tâche ne s'exécute dans le processus Streamlit qu'en mode mono-processus
+    (SIMULATEUR_WORKERS=0) : une tâche qui tue les processus de travail ne doit pas
+    pouvoir arrêter le serveur."""
+    if WORKER_PROCESSES <= 0:
+        return func(*args)
+    
+    for attempt in range(2):
+        pool = get_worker_pool()
+        try:
+            return pool.submit(func, *args).result()
+        except BrokenProcessPool as exc:
+            # Un processus est mort (OOM, crash) : le pool est inutilisable pour toutes les sessions.
+            # On ne remplace que le pool qui a échoué : une autre session l'a peut-être déjà recréé
+            with get_worker_pool_lock():
+                if get_worker_pool() is pool:
+                    get_worker_pool.clear()
+            pool.shutdown(wait=False, cancel_futures=True)
+            if attempt == 1:
+                raise RuntimeError(
+                    "le processus de calcul s'est arrêté de façon inattendue (mémoire insuffisante ?)"
+                ) from exc
+
+# Fonction pour générer le PDF, dans un processus de travail si disponible
+def build_proposal_pdf(df, proposal_number, client_info=None, remise_modes=None, rounding=DEFAULT_ROUNDING):
+    """Tarifie le panier et renvoie le PDF en octets"""
+    return run_in_worker(render_pdf_bytes, df, proposal_number, client_info, dict(remise_modes or {}), rounding)
+
+# Fonction pour générer le tarif catalogue XLSX, dans un processus de travail si disponible
+def build_price_list_xlsx(df, rounding=DEFAULT_ROUNDING):
+    """Tarifie le catalogue complet et renvoie le classeur XLSX en octets"""
+    return run_in_worker(render_price_list_xlsx, df, rounding)
+
 # Fonction pour initialiser les colonnes manquantes
 def initialize_dataframe_columns(df):
     """Initialise les colonnes manquantes avec des valeurs par défaut"""
@@ -399,6 +236,16 @@ def main():
     
     # Sidebar - Chargement de fichier
     with st.sidebar:
+        # Règle d'arrondi commune à l'aperçu, au récapitulatif, au PDF et aux exports
+        st.header("⚙️ Paramètres de calcul")
+        rounding_label = st.selectbox(
+            "Arrondi des prix",
+            list(ROUNDING_MODES),
+            key='mode_arrondi',
+            help="Les calculs au centime garantissent des totaux identiques partout"
+        )
+        rounding = ROUNDING_MODES[rounding_label]
+        
         st.header("📂 Gestion des données")
         
         uploaded_file = st.file_uploader(
@@ -429,6 +276,22 @@ def main():
                 st.write("**Répartition par catégorie:**")
                 for cat, count in categories.items():
                     st.write(f"• {cat}: {count} articles")
+            
+            # Export du tarif catalogue complet (recalculé)
+            if st.button("📊 Exporter le tarif catalogue (XLSX)", use_container_width=True):
+                try:
+                    with st.spinner("Export du catalogue en cours..."):
+                        # Tarification + écriture du classeur (dans un processus de travail si configuré)
+                        price_list = build_price_list_xlsx(st.session_state['articles_data'], rounding)
+                    st.download_button(
+                        label="📥 Télécharger le tarif",
+                        data=price_list,
+                        file_name=f"tarif-mont-royal-{datetime.now().strftime('%Y%m%d')}.xlsx",
+                        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                        use_container_width=True
+                    )
+                except Exception as e:
+                    st.error(f"❌ Erreur lors de l'export: {str(e)}")
         
         # Actions sur la sélection
         st.header("🛍️ Actions")
@@ -497,6 +360,8 @@ def main():
         st.subheader("📄 Articles disponibles")
         st.caption("Sélectionnez les articles à ajouter à votre proposition")
         
+        from st_aggrid import AgGrid, GridOptionsBuilder, GridUpdateMode
+        
         # Configuration de la grille
         gb = GridOptionsBuilder.from_dataframe(df_filtered)
         gb.configure_selection("multiple", use_checkbox=True, groupSelectsChildren=True)
@@ -671,30 +536,21 @@ def main():
                     st.session_state['selected_articles'].at[idx, 'RFA'] = rfa
                 
                 with col5:
-                    # Recalcule d'aperçu en temps réel (en respectant la logique globale)
-                    current_remise_euros = float(st.session_state['selected_articles'].at[idx, 'Remise (€)'])
-                    current_remise_autre = float(st.session_state['selected_articles'].at[idx, 'Remise autre (€)']) if 'Remise autre (€)' in st.session_state['selected_articles'].columns else 0.0
-                    current_coeff = float(st.session_state['selected_articles'].at[idx, 'Coeff'])
-                    current_rfa = float(st.session_state['selected_articles'].at[idx, 'RFA'])
-                    
-                    prix_net_ht = float(st.session_state['selected_articles'].at[idx, 'Prix Net HT'])
-                    prix_apres_remise = prix_net_ht - current_remise_euros - (current_remise_autre or 0.0)
-                    ppgc_ht = prix_apres_remise * current_coeff if current_coeff != 0 else 0.0
-                    ppgc_ttc = ppgc_ht * 1.20
-                    prix_net_net = prix_apres_remise - (prix_apres_remise * current_rfa / 100.0) if current_rfa != 0 else prix_apres_remise
+                    # Recalcule d'aperçu en temps réel (même noyau de calcul que le récapitulatif et le PDF)
+                    preview = calculate_derived_values(st.session_state['selected_articles'].loc[[idx]], rounding).iloc[0]
                     
                     st.write("**Résultats :**")
-                    st.write(f"Prix après remise : {prix_apres_remise:.2f}€")
-                    st.write(f"PPGC HT : {ppgc_ht:.2f}€")
-                    st.write(f"PPGC TTC : {ppgc_ttc:.2f}€")
-                    st.write(f"Prix Net Net : {prix_net_net:.2f}€")
+                    st.write(f"Prix après remise : {preview['Prix net après remise']:.2f}€")
+                    st.write(f"PPGC HT : {preview['PPGC HT']:.2f}€")
+                    st.write(f"PPGC TTC : {preview['PPGC TTC']:.2f}€")
+                    st.write(f"Prix Net Net : {preview['Prix Net Net']:.2f}€")
         
         # Bouton pour recalculer toutes les valeurs dérivées
         col1, col2 = st.columns(2)
         with col1:
             if st.button("🔄 Recalculer tout", type="primary"):
                 # Respect de la priorité : si Remise (%) > 0, on recalcule Remise (€) depuis Prix Brut HT
-                st.session_state['selected_articles'] = calculate_derived_values(st.session_state['selected_articles'])
+                st.session_state['selected_articles'] = calculate_derived_values(st.session_state['selected_articles'], rounding)
                 st.success("✅ Tous les calculs ont été mis à jour!")
                 st.rerun()
         
@@ -708,7 +564,7 @@ def main():
         st.subheader("📊 Récapitulatif des articles sélectionnés")
         
         # Recalculer pour l'affichage (garde la priorité au % si non nul)
-        display_df = calculate_derived_values(st.session_state['selected_articles'])
+        display_df = calculate_derived_values(st.session_state['selected_articles'], rounding)
         
         # Colonnes à afficher
         display_columns = ['Libellé article', 'Version', 'Code EDI', 'Prix Brut HT',
@@ -733,11 +589,43 @@ def main():
         
         # Résumé & PDF
         st.markdown("### 📊 Résumé de la proposition")
-        col1 = st.columns(1)[0]
+        by_category, totals = compute_proposal_summary(display_df)
+        col1, col2, col3, col4 = st.columns(4)
         total_articles = len(display_df)
         
         with col1:
             st.metric(label="📦 Nombre d'articles", value=total_articles)
+        with col2:
+            st.metric(label="💶 Total Prix Net Net", value=f"{totals['Prix Net Net']:.2f}€")
+        with col3:
+            st.metric(label="📈 Marge nette totale", value=f"{totals['Marge nette (€)']:.2f}€")
+        with col4:
+            st.metric(label="🎯 Taux de marque pondéré", value=f"{totals['Taux de marque pondéré']:.1f}%")
+        
+        # Détail par catégorie
+        summary_columns = ['Articles', 'Prix net après remise', 'PPGC HT', 'PPGC TTC', 'Prix Net Net',
+                           'Prix Net Net moyen', 'Marge nette (€)', 'Taux de marque pondéré', 'Taux de marque min',
+                           'Taux de marque médian', 'Taux de marque max']
+        summary_table = pd.concat([by_category, totals.to_frame(SUMMARY_TOTAL_LABEL).T])
+        summary_table.index = pd.RangeIndex(len(summary_table))
+        summary_table.insert(0, 'Catégorie produit', list(by_category.index) + [SUMMARY_TOTAL_LABEL])
+        st.dataframe(
+            summary_table[['Catégorie produit'] + summary_columns].style.format({
+                'Articles': '{:.0f}',
+                'Prix net après remise': '{:.2f}€',
+                'PPGC HT': '{:.2f}€',
+                'PPGC TTC': '{:.2f}€',
+                'Prix Net Net': '{:.2f}€',
+                'Prix Net Net moyen': '{:.2f}€',
+                'Marge nette (€)': '{:.2f}€',
+                'Taux de marque pondéré': '{:.1f}%',
+                'Taux de marque min': '{:.1f}%',
+                'Taux de marque médian': '{:.1f}%',
+                'Taux de marque max': '{:.1f}%'
+            }),
+            use_container_width=True,
+            hide_index=True
+        )
         
         st.markdown("---")
         st.subheader("📄 Génération de la proposition")
@@ -756,33 +644,56 @@ def main():
             st.write("")
             if st.button("📄 Générer la proposition PDF", type="primary", use_container_width=True):
                 try:
-                    buffer = BytesIO()
                     proposal_number = generate_proposal_number()
                     
                     with st.spinner("Génération du PDF en cours..."):
-                        # Recalculer toutes les valeurs dérivées avant de générer le PDF
-                        df_for_pdf = calculate_derived_values(st.session_state['selected_articles'])
-                        
-                        # Passer les modes de remise à la fonction de génération PDF
-                        generate_pdf(
-                            df_for_pdf, 
+                        # Recalcul des valeurs dérivées et rendu PDF (dans un processus de travail si configuré)
+                        pdf_bytes = build_proposal_pdf(
+                            st.session_state['selected_articles'], 
                             proposal_number, 
-                            buffer, 
                             client_info,
-                            st.session_state['remise_modes']
+                            st.session_state['remise_modes'],
+                            rounding
                         )
                     
                     st.success("✅ PDF généré avec succès!")
                     
                     st.download_button(
                         label="📥 Télécharger le PDF",
-                        data=buffer.getvalue(),
+                        data=pdf_bytes,
                         file_name=f"{proposal_number}.pdf",
                         mime="application/pdf",
                         type="primary"
                     )
                 except Exception as e:
                     st.error(f"❌ Erreur lors de la génération du PDF: {str(e)}")
+        
+        # Export tableur du panier tarifé (récapitulatif + marges)
+        st.markdown("#### 📊 Export tableur")
+        col1, col2 = st.columns(2)
+        export_name = f"proposition-{datetime.now().strftime('%Y%m%d-%H%M')}"
+        
+        with col1:
+            # Classeur construit uniquement sur demande (pas à chaque réexécution)
+            if st.button("📊 Exporter en Excel (XLSX)", use_container_width=True):
+                xlsx_buffer = BytesIO()
+                export_xlsx(display_df, xlsx_buffer)
+                st.download_button(
+                    label="📥 Télécharger en Excel (XLSX)",
+                    data=xlsx_buffer.getvalue(),
+                    file_name=f"{export_name}.xlsx",
+                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                    use_container_width=True
+                )
+        
+        with col2:
+            st.download_button(
+                label="📥 Télécharger en CSV",
+                data=export_csv(display_df),
+                file_name=f"{export_name}.csv",
+                mime="text/csv",
+                use_container_width=True
+            )
 
 if __name__ == "__main__":
     main()